@@ -1,18 +1,34 @@
 from fastapi import FastAPI, Body
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from services.template_service import (
     render_json_template,
     render_turtle_template
 )
 
-import httpx, uvicorn, os, base64, re, traceback
-from fastapi import HTTPException, FastAPI, Request
-from fastapi.responses import JSONResponse
+import asyncio, httpx, orjson, pybase64, uvicorn, os, sys, time, traceback, uuid
+from contextlib import asynccontextmanager
+from fastapi import BackgroundTasks, HTTPException, FastAPI, Request
 from rdflib import Graph, URIRef, Literal, Namespace
 from urllib.parse import urlparse
 from rdflib.namespace import DCTERMS
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share one pooled HTTP client across requests for the app's lifetime."""
+    # HTTP/2 (negotiated via ALPN) lets concurrent GitHub/FAIRsharing calls
+    # multiplex over a single connection per host.
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        timeout=httpx.Timeout(20.0),
+    )
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+
+
 app = FastAPI(
     title="OSTrails proxy service",
     description="Proxy for processing and submitting RDF metadata records to GitHub and FAIRsharing.",
@@ -20,6 +36,8 @@ app = FastAPI(
     docs_url="/questionnaire/docs",
     redoc_url=None,
     openapi_url="/questionnaire/openapi.json",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 @app.get("/questionnaire/", summary="Health check", description="Verify that the API is running correctly.")
@@ -48,11 +66,89 @@ GITHUB_OWNER = "OSTrails"
 GITHUB_REPO = "assessment-component-metadata-records"
 GITHUB_BRANCH = "main"
 
+GITHUB_CONTENTS_URL = f"https://api.github.com/repos/{GITHUB_OWNER}/{GITHUB_REPO}/contents/"
+GITHUB_HEADERS = {
+    "Authorization": f"Bearer {GITHUB_TOKEN}",
+    "Accept": "application/vnd.github+json",
+}
+
+# Blob sha of files we committed ourselves, so their preflight GET can be skipped.
+_KNOWN_PRESENT: dict[str, str] = {}
+_KNOWN_PRESENT_MAXSIZE = 10_000
+
 # FAIRsharing GraphQL settings
 FAIRSHARING_GRAPHQL_ENDPOINT = "https://api.fairsharing.org/graphql"
 FAIRSHARING_GRAPHQL_KEY = "484de7ca-4496-4ee7-8cbf-578d2923c08f"
 
+# Constant GraphQL documents; the IRI travels in "variables" so the server
+# can reuse its parsed/validated query instead of seeing a new one per IRI.
+SEARCH_SUBJECTS_Q = "query($q: String!) { searchSubjects(q: $q) { id iri } }"
+SEARCH_DOMAINS_Q = "query($q: String!) { searchDomains(q: $q) { id iri } }"
+
+# In-process cache of (type_, iri) -> (expires_at, internal_id). FAIRsharing
+# ids change rarely; unknown IRIs are cached for a shorter time.
+_ID_CACHE: dict[tuple[str, str], tuple[float, object]] = {}
+_ID_CACHE_TTL = 86400
+_ID_CACHE_NEGATIVE_TTL = 3600
+_ID_CACHE_MAXSIZE = 10_000
+
+# FAIRsharing JWT, reused until shortly before its "exp" claim.
+_JWT: dict = {"token": None, "exp": 0.0}
+_JWT_LEEWAY = 30
+
+# Outcome of requests accepted with ?background=true, keyed by job id.
+_JOBS: dict[str, dict] = {}
+_JOBS_MAXSIZE = 1000
+
 DCTERMS = Namespace("http://purl.org/dc/terms/")
+DCTERMS_IDENTIFIER = DCTERMS.identifier
+
+# ─────────────────────────────────────────────────────────────
+# Background jobs: answer 202 now, run GitHub/FAIRsharing calls after
+# ─────────────────────────────────────────────────────────────
+async def _run_job(job_id: str, func, *args):
+    try:
+        _JOBS[job_id] = {"id": job_id, "status": "success", "result": await func(*args)}
+    except HTTPException as e:
+        _JOBS[job_id] = {"id": job_id, "status": "error", "status_code": e.status_code, "message": e.detail}
+    except Exception as e:
+        traceback.print_exc()
+        _JOBS[job_id] = {
+            "id": job_id,
+            "status": "error",
+            "status_code": 500,
+            "message": f"Unexpected internal error: {e}",
+        }
+
+
+def accept_job(background_tasks: BackgroundTasks, func, *args) -> ORJSONResponse:
+    """Schedule `func(*args)` after the response and return 202 with a job id to poll."""
+    job_id = uuid.uuid4().hex
+    while len(_JOBS) >= _JOBS_MAXSIZE:
+        _JOBS.pop(next(iter(_JOBS)))
+    _JOBS[job_id] = {"id": job_id, "status": "pending"}
+    background_tasks.add_task(_run_job, job_id, func, *args)
+    return ORJSONResponse(
+        status_code=202,
+        content={
+            "status": "accepted",
+            "id": job_id,
+            "status_url": f"/questionnaire/status/{job_id}",
+        },
+    )
+
+
+@app.get(
+    "/questionnaire/status/{job_id}",
+    summary="Background job status",
+    description="Poll the outcome of a request submitted with `?background=true`.",
+)
+async def job_status(job_id: str):
+    job = _JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Unknown job id '{job_id}'.")
+    return job
+
 
 # ═══════════════════════════════════════════════════════════════════
 ############################### GITHUB ##############################
@@ -67,21 +163,21 @@ async def render_json(input_json: dict = Body(...)):
     Render FAIRsharing-compatible JSON
     """
     rendered = render_json_template(input_json)
-    return JSONResponse(content=rendered)
+    return ORJSONResponse(content=rendered)
 
 # ─────────────────────────────────────────────────────────────
 # Helper functions
 # ─────────────────────────────────────────────────────────────
-def _extract_record_info(rdf_text: str):
+def _extract_record_info(rdf_bytes: bytes):
     """Extract record_id, category, and URI from RDF Turtle content."""
     g = Graph()
     try:
-        g.parse(data=rdf_text, format="turtle")
+        g.parse(data=rdf_bytes, format="turtle")
     except Exception as e:
         raise HTTPException(400, f"Invalid RDF format: {e}")
 
     uri_candidate = None
-    for s, _, _ in g.triples((None, DCTERMS.identifier, None)):
+    for s in g.subjects(predicate=DCTERMS_IDENTIFIER):
         if isinstance(s, URIRef):
             uri_candidate = str(s)
             break
@@ -89,13 +185,14 @@ def _extract_record_info(rdf_text: str):
     if uri_candidate is None:
         raise HTTPException(400, "No valid identifier or subject URI found in RDF.")
 
+    # urlparse (not urlsplit) so ";params" stay out of the record id, and
+    # empty segments are skipped so "a//b.ttl" still means category "a".
     path_parts = [p for p in urlparse(uri_candidate).path.split("/") if p]
     if len(path_parts) < 2:
         raise HTTPException(400, f"URI '{uri_candidate}' is malformed or missing path structure.")
 
-    filename = path_parts[-1]
-    category = path_parts[-2]
-    record_id = re.sub(r"\.ttl$", "", filename, flags=re.IGNORECASE)
+    category, filename = path_parts[-2:]
+    record_id = filename[:-4] if filename.lower().endswith(".ttl") else filename
 
     return record_id, category, uri_candidate
 
@@ -103,38 +200,59 @@ def _extract_record_info(rdf_text: str):
 # ─────────────────────────────────────────────────────────────
 # GitHub Commit Function
 # ─────────────────────────────────────────────────────────────
-async def commit_rdf_to_github(client: httpx.AsyncClient, rdf_text: str):
+async def _preflight_sha(client: httpx.AsyncClient, url: str, path: str):
+    """Return the current blob sha of `path`, or None if it does not exist yet."""
+    if path in _KNOWN_PRESENT:
+        return _KNOWN_PRESENT[path]
+
+    pre = await client.get(url, headers=GITHUB_HEADERS)
+    if pre.status_code == 200:
+        return orjson.loads(pre.content).get("sha")
+    if pre.status_code == 404:
+        return None
+    raise HTTPException(500, f"GitHub preflight failed: {pre.text}")
+
+
+async def commit_rdf_to_github(client: httpx.AsyncClient, rdf_bytes: bytes):
     """Commit or update an RDF Turtle record into the GitHub repository."""
     if not all([GITHUB_TOKEN, GITHUB_OWNER, GITHUB_REPO]):
         raise HTTPException(500, "GitHub credentials or configuration missing.")
 
-    record_id, category, uri_candidate = _extract_record_info(rdf_text)
+    record_id, category, uri_candidate = _extract_record_info(rdf_bytes)
     path = f"{category.rstrip('/')}/{record_id}.ttl"
-    url = f"https://api.github.com/repos/{GITHUB_OWNER}/{GITHUB_REPO}/contents/{path}"
-    headers = {
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github+json",
-    }
+    url = GITHUB_CONTENTS_URL + path
+    headers = {**GITHUB_HEADERS, "Content-Type": "application/json"}
+    content = pybase64.b64encode(rdf_bytes).decode("ascii")
 
     try:
-        sha = None
-        pre = await client.get(url, headers=headers)
-        if pre.status_code == 200:
-            sha = pre.json().get("sha")
-        elif pre.status_code not in (404,):
-            raise HTTPException(500, f"GitHub preflight failed: {pre.text}")
-
-        payload = {
-            "message": f"Add or update RDF record '{record_id}' in category '{category}'.",
-            "content": base64.b64encode(rdf_text.encode()).decode(),
-            "branch": GITHUB_BRANCH,
-            **({"sha": sha} if sha else {}),
-        }
+        for attempt in range(2):
+            sha = await _preflight_sha(client, url, path)
+            payload = {
+                "message": f"Add or update RDF record '{record_id}' in category '{category}'.",
+                "content": content,
+                "branch": GITHUB_BRANCH,
+                **({"sha": sha} if sha else {}),
+            }
 
-        put = await client.put(url, headers=headers, json=payload)
+            # The contents API takes its precondition from "sha" in the body
+            # (it does not honour If-Match): a stale known sha comes back as
+            # 409/422, so forget it, preflight again and retry once.
+            put = await client.put(url, headers=headers, content=orjson.dumps(payload))
+            if put.status_code in (409, 422) and attempt == 0:
+                _KNOWN_PRESENT.pop(path, None)
+                continue
+            break
         put.raise_for_status()
 
-        commit_data = put.json()
+        commit_data = orjson.loads(put.content)
+        new_sha = commit_data.get("content", {}).get("sha")
+        if new_sha:
+            if path not in _KNOWN_PRESENT and len(_KNOWN_PRESENT) >= _KNOWN_PRESENT_MAXSIZE:
+                _KNOWN_PRESENT.pop(next(iter(_KNOWN_PRESENT)))
+            _KNOWN_PRESENT[path] = new_sha
+        else:
+            _KNOWN_PRESENT.pop(path, None)
+
         return {
             "status": "success",
             "action": "update" if sha else "create",
@@ -163,33 +281,37 @@ async def commit_rdf_to_github(client: httpx.AsyncClient, rdf_text: str):
     Upload an RDF record (in Turtle format) to the OSTrails GitHub repository.
     Automatically creates or updates the corresponding `.ttl` file under its category folder.
     Returns structured feedback including commit URLs and record identifiers.
+    With `?background=true`, returns 202 with a job id to poll at `/questionnaire/status/{id}`.
     """,
 )
-async def githubpush(input_json: dict = Body(...)):
+async def githubpush(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    background: bool = False,
+    input_json: dict = Body(...),
+):
     try:
         # Step 1 — Render RDF
-        rdf_text = render_turtle_template(input_json)
+        rdf_bytes = render_turtle_template(input_json).encode("utf-8")
 
-        # Step 2 — Commit to GitHub        
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            response = await commit_rdf_to_github(client, rdf_text)
-            return JSONResponse(content=response, status_code=200)
+        # Step 2 — Commit to GitHub
+        if background:
+            return accept_job(background_tasks, commit_rdf_to_github, request.app.state.http, rdf_bytes)
+        response = await commit_rdf_to_github(request.app.state.http, rdf_bytes)
+        return ORJSONResponse(content=response, status_code=200)
 
     except HTTPException as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=e.status_code,
             content={"status": "error", "message": e.detail},
         )
     except Exception as e:
-        traceback.print_exc()
-        return JSONResponse(
-            status_code=500,
-            content={
-                "status": "error",
-                "message": f"Unexpected internal error: {e}",
-                "trace": traceback.format_exc().splitlines()[-5:],
-            },
-        )
+        tb = traceback.format_exc()
+        sys.stderr.write(tb)
+        content = {"status": "error", "message": f"Unexpected internal error: {e}"}
+        if request.app.debug:
+            content["trace"] = tb.splitlines()[-5:]
+        return ORJSONResponse(status_code=500, content=content)
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -205,29 +327,52 @@ async def render_json(input_json: dict = Body(...)):
     Render FAIRsharing-compatible JSON
     """
     rendered = render_json_template(input_json)
-    return JSONResponse(content=rendered)
+    return ORJSONResponse(content=rendered)
 
 # ─────────────────────────────────────────────────────────────
 # Helper: resolve subject/domain IDs (inside fairsharing_record)
 # ─────────────────────────────────────────────────────────────
+def _first_id(results):
+    if results and isinstance(results, list) and results[0].get("id"):
+        return results[0]["id"]
+    return None
+
+
+def _cached_id(type_: str, iri: str):
+    """Return (hit, internal_id) for an unexpired cache entry."""
+    entry = _ID_CACHE.get((type_, iri))
+    if entry is not None:
+        if time.monotonic() < entry[0]:
+            return True, entry[1]
+        del _ID_CACHE[(type_, iri)]
+    return False, None
+
+
+def _cache_id(type_: str, iri: str, results):
+    """Cache a search result: a found id, or a miss only if FAIRsharing returned an empty list."""
+    internal_id = _first_id(results)
+    if internal_id is not None:
+        ttl = _ID_CACHE_TTL
+    elif results == []:
+        ttl = _ID_CACHE_NEGATIVE_TTL
+    else:
+        # null / malformed result (resolver error): do not remember it.
+        return internal_id
+    if len(_ID_CACHE) >= _ID_CACHE_MAXSIZE:
+        _ID_CACHE.pop(next(iter(_ID_CACHE)))
+    _ID_CACHE[(type_, iri)] = (time.monotonic() + ttl, internal_id)
+    return internal_id
+
+
 async def fetch_internal_id(client: httpx.AsyncClient, iri: str, type_: str):
     if type_ == "subject":
-        query_field = "searchSubjects"
+        query_field, query_doc = "searchSubjects", SEARCH_SUBJECTS_Q
     elif type_ == "domain":
-        query_field = "searchDomains"
+        query_field, query_doc = "searchDomains", SEARCH_DOMAINS_Q
     else:
         raise ValueError("Unknown type_")
 
-    query = {
-        "query": f"""
-        query {{
-            {query_field}(q: "{iri}") {{
-            id
-            iri
-            }}
-        }}
-        """
-    }
+    query = {"query": query_doc, "variables": {"q": iri}}
 
     try:
         resp = await client.post(
@@ -237,162 +382,278 @@ async def fetch_internal_id(client: httpx.AsyncClient, iri: str, type_: str):
             timeout=10.0,
         )
         resp.raise_for_status()
-        data = resp.json()
-        results = data.get("data", {}).get(query_field, [])
-        if results and isinstance(results, list) and results[0].get("id"):
-            return results[0]["id"]
+        data = orjson.loads(resp.content)
+        results = (data.get("data") or {}).get(query_field)
+        if data.get("errors"):
+            return _first_id(results)
+        return _cache_id(type_, iri, results)
     except Exception as e:
         print(f"GraphQL query failed for {iri}: {e}")
     return None
 
 
-async def resolve_subject_domain_ids(body_dict: dict) -> dict:
-    async with httpx.AsyncClient() as client:
-        record = body_dict.get("fairsharing_record", {})
+async def fetch_internal_ids(client: httpx.AsyncClient, subjects: list, domains: list):
+    """Resolve all subject and domain IRIs, fetching cache misses in one GraphQL request."""
+    keys = [("subject", iri) for iri in subjects] + [("domain", iri) for iri in domains]
 
-        # Resolve subjects
-        if "subject_ids" in record and isinstance(record["subject_ids"], list):
-            resolved_subjects = []
-            for iri in record["subject_ids"]:
-                internal_id = await fetch_internal_id(client, iri, "subject")
-                if internal_id is not None:
-                    resolved_subjects.append(internal_id)
-                else:
-                    print(f"Removed subject URI without internal ID: {iri}")
-            record["subject_ids"] = resolved_subjects
-
-        # Resolve domains
-        if "domain_ids" in record and isinstance(record["domain_ids"], list):
-            resolved_domains = []
-            for iri in record["domain_ids"]:
-                internal_id = await fetch_internal_id(client, iri, "domain")
-                if internal_id is not None:
-                    resolved_domains.append(internal_id)
-                else:
-                    print(f"Removed domain URI without internal ID: {iri}")
-            record["domain_ids"] = resolved_domains
+    found = {}
+    for key in keys:
+        hit, internal_id = _cached_id(*key)
+        if hit:
+            found[key] = internal_id
+
+    missing = list(dict.fromkeys(key for key in keys if key not in found))
+    if missing:
+        found.update(await _fetch_missing_ids(client, missing))
+
+    ids = [found.get(key) for key in keys]
+    return ids[:len(subjects)], ids[len(subjects):]
+
+
+async def _fetch_missing_ids(client: httpx.AsyncClient, keys: list) -> dict:
+    # Only the number of aliases shapes the document; IRIs go in variables.
+    fields = {"subject": "searchSubjects", "domain": "searchDomains"}
+    query = (
+        "query(" + ", ".join(f"$q{i}: String!" for i in range(len(keys))) + ") { "
+        + "".join(
+            f"q{i}: {fields[type_]}(q: $q{i}) {{ id iri }} "
+            for i, (type_, _) in enumerate(keys)
+        )
+        + "}"
+    )
+    variables = {f"q{i}": iri for i, (_, iri) in enumerate(keys)}
 
-        body_dict["fairsharing_record"] = record
+    try:
+        resp = await client.post(
+            FAIRSHARING_GRAPHQL_ENDPOINT,
+            json={"query": query, "variables": variables},
+            headers={"x-graphql-key": FAIRSHARING_GRAPHQL_KEY},
+            timeout=10.0,
+        )
+        resp.raise_for_status()
+        payload = orjson.loads(resp.content)
+        data = payload.get("data")
+        if data:
+            # Aliases named in "errors" failed to resolve; don't cache them.
+            errored = {
+                e["path"][0]
+                for e in payload.get("errors") or []
+                if isinstance(e, dict) and e.get("path")
+            }
+            found = {}
+            for i, key in enumerate(keys):
+                results = data.get(f"q{i}")
+                if f"q{i}" in errored:
+                    found[key] = _first_id(results)
+                else:
+                    found[key] = _cache_id(*key, results)
+            return found
+        print(f"GraphQL batch query rejected: {payload.get('errors')}")
+    except Exception as e:
+        print(f"GraphQL batch query failed: {e}")
+
+    # Batch rejected (e.g. over the query complexity limit): fall back to
+    # one lookup per IRI, issued concurrently over the shared client.
+    results = await asyncio.gather(
+        *(fetch_internal_id(client, iri, type_) for type_, iri in keys)
+    )
+    return dict(zip(keys, results))
+
+
+async def resolve_subject_domain_ids(client: httpx.AsyncClient, body_dict: dict) -> dict:
+    record = body_dict.get("fairsharing_record", {})
+
+    subjects = record.get("subject_ids")
+    subjects = subjects if isinstance(subjects, list) else []
+    domains = record.get("domain_ids")
+    domains = domains if isinstance(domains, list) else []
+
+    subject_ids, domain_ids = await fetch_internal_ids(client, subjects, domains)
+
+    # Resolve subjects
+    if "subject_ids" in record and isinstance(record["subject_ids"], list):
+        resolved_subjects = []
+        for iri, internal_id in zip(subjects, subject_ids):
+            if internal_id is not None:
+                resolved_subjects.append(internal_id)
+            else:
+                print(f"Removed subject URI without internal ID: {iri}")
+        record["subject_ids"] = resolved_subjects
+
+    # Resolve domains
+    if "domain_ids" in record and isinstance(record["domain_ids"], list):
+        resolved_domains = []
+        for iri, internal_id in zip(domains, domain_ids):
+            if internal_id is not None:
+                resolved_domains.append(internal_id)
+            else:
+                print(f"Removed domain URI without internal ID: {iri}")
+        record["domain_ids"] = resolved_domains
+
+    body_dict["fairsharing_record"] = record
     return body_dict
 # ─────────────────────────────────────────────────────────────
 # Remove empty JSON keys, create an error in FAIRsharing
 # ─────────────────────────────────────────────────────────────
 def remove_empty(obj):
+    # Only containers are recursed into; scalar leaves (the bulk of a record)
+    # are tested inline instead of paying a call plus tuple comparison each.
     if isinstance(obj, dict):
-        
-        return {
-            k: remove_empty(v)
-            for k, v in obj.items()
-            if v not in (None, "", [], {}) and remove_empty(v) != {}
-        }
+        cleaned = {}
+        for k, v in obj.items():
+            if isinstance(v, (dict, list)):
+                v = remove_empty(v)
+                if not v:
+                    continue
+            elif v is None or v == "":
+                continue
+            cleaned[k] = v
+        return cleaned
     elif isinstance(obj, list):
-        cleaned = [remove_empty(v) for v in obj if v not in (None, "", [], {})]
-        return [v for v in cleaned if v != {}]
+        cleaned = []
+        for v in obj:
+            if isinstance(v, (dict, list)):
+                v = remove_empty(v)
+                if not v:
+                    continue
+            elif v is None or v == "":
+                continue
+            cleaned.append(v)
+        return cleaned
     else:
         return obj
 
+# ─────────────────────────────────────────────────────────────
+# Helper: FAIRsharing authentication and record submission
+# ─────────────────────────────────────────────────────────────
+def _jwt_expiry(token: str) -> float:
+    """Read the exp claim of a JWT (the signature is not verified)."""
+    try:
+        claims = token.split(".")[1]
+        claims = orjson.loads(pybase64.urlsafe_b64decode(claims + "=" * (-len(claims) % 4)))
+        return float(claims["exp"])
+    except Exception:
+        return 0.0
+
+
+async def _fairsharing_token(client: httpx.AsyncClient, refresh: bool = False) -> str:
+    if not refresh and _JWT["token"] and time.time() < _JWT["exp"] - _JWT_LEEWAY:
+        return _JWT["token"]
+
+    auth = await client.post(
+        AUTH_URL,
+        headers={"Accept": "application/json", "Content-Type": "application/json"},
+        json={"user": {"login": USERNAME, "password": PASSWORD}},
+        timeout=15.0,
+    )
+    auth.raise_for_status()
+    token = orjson.loads(auth.content).get("jwt")
+    if not token:
+        raise HTTPException(500, "Missing jwt token")
+
+    _JWT["token"], _JWT["exp"] = token, _jwt_expiry(token)
+    return token
+
+
+async def post_fairsharing_record(client: httpx.AsyncClient, body_dict: dict) -> httpx.Response:
+    """Submit a cleaned record to FAIRsharing using the cached JWT."""
+    content = orjson.dumps(body_dict)
+
+    async def _post(token):
+        return await client.post(
+            DATA_URL,
+            content=content,
+            headers={
+                "Accept": "application/json",
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {token}",
+            },
+        )
+
+    data_response = await _post(await _fairsharing_token(client))
+    if data_response.status_code == 401:
+        # Cached token was revoked or expired early: sign in again, retry once.
+        data_response = await _post(await _fairsharing_token(client, refresh=True))
+    data_response.raise_for_status()
+    return data_response
+
 # ═══════════════════════════════════════════════════════════════════
 # Submit FAIRsharing endpoint
 # ═══════════════════════════════════════════════════════════════════
-@app.post("/questionnaire/submit-onlyFAIRsharing", summary="Submit record to FAIRsharing",response_class=JSONResponse)
-async def submit_record(input_json: dict = Body(...)):
+@app.post("/questionnaire/submit-onlyFAIRsharing", summary="Submit record to FAIRsharing",response_class=ORJSONResponse)
+async def submit_record(request: Request, input_json: dict = Body(...)):
     """Authenticate with FAIRsharing, resolve subject/domain IDs, and submit the cleaned record."""
+    client = request.app.state.http
 
     body_dict = render_json_template(input_json)
 
-    body_dict = await resolve_subject_domain_ids(body_dict)
+    body_dict = await resolve_subject_domain_ids(client, body_dict)
 
     body_dict = remove_empty(body_dict)
     # print(json.dumps(body_dict, indent=2))  # Double-quoted JSON for readability
-    
-    async with httpx.AsyncClient() as client:
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
-        auth = await client.post(
-            AUTH_URL,
-            headers=headers,
-            json={"user": {"login": USERNAME, "password": PASSWORD}},
-            timeout=15.0,
-        )
-        auth.raise_for_status()
-        token = auth.json().get("jwt")
-        if not token:
-            raise HTTPException(500, "Missing jwt token")
 
-        headers["Authorization"] = f"Bearer {token}"
-        data_response = await client.post(DATA_URL, json=body_dict, headers=headers)
-        data_response.raise_for_status()
+    data_response = await post_fairsharing_record(client, body_dict)
 
-        return {
-            "status": "success",
-            "data_status_code": data_response.status_code,
-            "response": data_response.json(),
+    return {
+        "status": "success",
+        "data_status_code": data_response.status_code,
+        "response": orjson.loads(data_response.content),
+    }
+
+
+async def push_and_submit(client: httpx.AsyncClient, input_json: dict) -> dict:
+    # ─────────────────────────────
+    # GitHub
+    # ─────────────────────────────
+    rdf_bytes = render_turtle_template(input_json).encode("utf-8")
+
+    github_response = await commit_rdf_to_github(client, rdf_bytes)
+
+    # ─────────────────────────────
+    # FAIRsharing
+    # ─────────────────────────────
+    body_dict = render_json_template(input_json)
+    body_dict = await resolve_subject_domain_ids(client, body_dict)
+    body_dict = remove_empty(body_dict)
+
+    data_response = await post_fairsharing_record(client, body_dict)
+
+    fairsharing_response = orjson.loads(data_response.content)
+
+    # ─────────────────────────────
+    # Return Combined Result
+    # ─────────────────────────────
+    return {
+        "status": "success",
+        "github": github_response,
+        "fairsharing": {
+            "status_code": data_response.status_code,
+            "response": fairsharing_response
         }
+    }
 
 
-@app.post("/questionnaire/submit", summary="Submit record to Github and FAIRsharing",response_class=JSONResponse)
-async def submit_record(input_json: dict = Body(...)):
+@app.post("/questionnaire/submit", summary="Submit record to Github and FAIRsharing",response_class=ORJSONResponse)
+async def submit_record(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    background: bool = False,
+    input_json: dict = Body(...),
+):
     """Authenticate with Github, then FAIRsharing:
     First Upload an RDF record (in Turtle format) to the OSTrails GitHub repository.
     Automatically creates or updates the corresponding `.ttl` file under its category folder.
     Returns structured feedback including commit URLs and record identifiers.
-    Then, for FAIRsharing, resolve subject/domain IDs, and submit the JSON-based cleaned record."""
+    Then, for FAIRsharing, resolve subject/domain IDs, and submit the JSON-based cleaned record.
+    With `?background=true`, returns 202 with a job id to poll at `/questionnaire/status/{id}`."""
 
-    try:
-        # ─────────────────────────────
-        # GitHub
-        # ─────────────────────────────
-        rdf_text = render_turtle_template(input_json)
-
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            github_response = await commit_rdf_to_github(client, rdf_text)
-
-        # ─────────────────────────────
-        # FAIRsharing
-        # ─────────────────────────────
-        body_dict = render_json_template(input_json)
-        body_dict = await resolve_subject_domain_ids(body_dict)
-        body_dict = remove_empty(body_dict)
-
-        async with httpx.AsyncClient() as client:
-            headers = {
-                "Accept": "application/json",
-                "Content-Type": "application/json"
-            }
-
-            auth = await client.post(
-                AUTH_URL,
-                headers=headers,
-                json={"user": {"login": USERNAME, "password": PASSWORD}},
-                timeout=15.0,
-            )
-            auth.raise_for_status()
-
-            token = auth.json().get("jwt")
-            if not token:
-                raise HTTPException(500, "Missing jwt token")
-
-            headers["Authorization"] = f"Bearer {token}"
+    client = request.app.state.http
 
-            data_response = await client.post(
-                DATA_URL,
-                json=body_dict,
-                headers=headers
-            )
-            data_response.raise_for_status()
+    if background:
+        return accept_job(background_tasks, push_and_submit, client, input_json)
 
-            fairsharing_response = data_response.json()
-
-        # ─────────────────────────────
-        # Return Combined Result
-        # ─────────────────────────────
-        return {
-            "status": "success",
-            "github": github_response,
-            "fairsharing": {
-                "status_code": data_response.status_code,
-                "response": fairsharing_response
-            }
-        }
+    try:
+        return await push_and_submit(client, input_json)
 
     except HTTPException as e:
         raise e
@@ -406,13 +667,13 @@ async def submit_record(input_json: dict = Body(...)):
 
 # For testing the templates:
 
-@app.post("/questionnaire/render/json", response_class=JSONResponse)
+@app.post("/questionnaire/render/json", response_class=ORJSONResponse)
 async def render_json(input_json: dict = Body(...)):
     """
     Render FAIRsharing-compatible JSON
     """
     rendered = render_json_template(input_json)
-    return JSONResponse(content=rendered)
+    return ORJSONResponse(content=rendered)
 
 
 @app.post("/questionnaire/render/turtle", response_class=PlainTextResponse)
@@ -425,4 +686,4 @@ async def render_turtle(input_json: dict = Body(...)):
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
\ No newline at end of file